@@ -1,5 +1,6 @@
 import logging
-from typing import List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Union
 from urllib.parse import parse_qs
 
 from linebot.models import (
@@ -37,6 +38,12 @@ logger = logging.getLogger(__name__)
 MENU_COMMANDS = ["0", "啊哇呾喀呾啦", "menu", "選單"]
 LUMOS_COMMANDS = ["路摸思", "lumos"]
 
+"""系統錯誤時的回覆訊息"""
+ERROR_REPLY = "系統忙碌中，請稍後重試。若問題持續發生，請聯繫客服，謝謝您的耐心!"
+
+"""耗時請求（網頁爬取、AI 生成）改由背景執行緒處理，避免阻塞 webhook"""
+reply_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="line-reply")
+
 # TODO
 """追蹤正在處理的用戶請求"""
 
@@ -66,9 +73,11 @@ def handle_postback(event):
             topic_id, count = news_count.split('/')
             response = get_news(topic_id, int(count))
         elif action == 'movie':
-            response = get_movies()
+            reply_in_background(event.reply_token, get_movies)
+            return
         elif action == 'japanese':
-            response = get_japanese_word(chat_id)
+            reply_in_background(event.reply_token, get_japanese_word, chat_id)
+            return
         elif action == 'english':
             response = get_english_difficulty_menu()
         elif action == 'english_subscribe':
@@ -94,7 +103,8 @@ def handle_postback(event):
             response = get_english_count_menu(english_difficulty)
         elif english_count:
             difficulty_id, count = english_count.split('/')
-            response = get_english_words(chat_id, int(difficulty_id), int(count))
+            reply_in_background(event.reply_token, get_english_words, chat_id, int(difficulty_id), int(count))
+            return
         else:
             response = "這功能正在裝上輪子，還在趕來的路上"
 
@@ -102,7 +112,7 @@ def handle_postback(event):
 
     except Exception as e:
         logger.error(f"處理 postback 事件時發生錯誤: {e}", exc_info=True)
-        reply_to_user(event.reply_token, "系統忙碌中，請稍後重試。若問題持續發生，請聯繫客服，謝謝您的耐心!")
+        reply_to_user(event.reply_token, ERROR_REPLY)
 
 
 @handler.add(MessageEvent, message=TextMessage)
@@ -118,7 +128,7 @@ def process_text_message(event):
             reply_to_user(event.reply_token, response)
     except Exception as e:
         logger.error(f"處理文字訊息時發生錯誤 (聊天室: {chat_id}): {e}", exc_info=True)
-        reply_to_user(event.reply_token, "系統忙碌中，請稍後重試。若問題持續發生，請聯繫客服，謝謝您的耐心!")
+        reply_to_user(event.reply_token, ERROR_REPLY)
 
 
 def process_user_input(chat_id: str, message_text: str) -> Union[str, TextSendMessage, FlexSendMessage, List]:
@@ -133,6 +143,23 @@ def process_user_input(chat_id: str, message_text: str) -> Union[str, TextSendMe
     return groq_service.chat_with_groq(chat_id, message_text)
 
 
+def reply_in_background(reply_token: str, func: Callable, *args):
+    """於背景執行耗時的請求，完成後再回覆用戶"""
+
+    def task():
+        try:
+            reply_to_user(reply_token, func(*args))
+        except Exception as e:
+            logger.error(f"背景處理請求時發生錯誤: {e}", exc_info=True)
+            # 回覆本身也可能失敗（例如 LINE API 錯誤或 reply token 已使用），需另外記錄
+            try:
+                reply_to_user(reply_token, ERROR_REPLY)
+            except Exception as reply_error:
+                logger.error(f"背景回覆錯誤訊息失敗: {reply_error}", exc_info=True)
+
+    reply_executor.submit(task)
+
+
 def reply_to_user(reply_token: str, message: Union[str, TextSendMessage, FlexSendMessage, List]):
     """回覆用戶訊息"""
     if isinstance(message, list):
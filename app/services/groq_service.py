@@ -1,4 +1,5 @@
 import logging
+import threading
 from typing import Union
 
 from groq import Groq
@@ -31,6 +32,10 @@ user_sessions = {
     'japanese': {},  # 日文學習
 }
 
+# 每個會話（會話類型 + 聊天室）的對話紀錄鎖
+_session_locks = {}
+_session_locks_guard = threading.Lock()
+
 # 追蹤用戶的 AI 回應狀態
 chat_ai_status = {}
 
@@ -97,6 +102,17 @@ SYSTEM_PROMPTS = {
 }
 
 
+def _get_session_lock(chat_id: str, session_type: str) -> threading.Lock:
+    """
+    取得單一會話（會話類型 + 聊天室）專屬的對話紀錄鎖
+    :param chat_id: 聊天室 ID（群組 ID 或用戶 ID）
+    :param session_type: 會話類型 ('chat', 'english', 'japanese')
+    :return: 該會話的 Lock
+    """
+    with _session_locks_guard:
+        return _session_locks.setdefault((session_type, chat_id), threading.Lock())
+
+
 def chat_with_groq(chat_id: str, message: str, model: str = "llama-3.3-70b-versatile",
                    session_type: str = "chat") -> Union[str, None]:
     """
@@ -112,63 +128,66 @@ def chat_with_groq(chat_id: str, message: str, model: str = "llama-3.3-70b-versa
     if session_type == 'chat' and not get_ai_status(chat_id):
         return None
 
-    # 初始化使用者對話紀錄，使用對應的系統提示詞
-    if chat_id not in user_sessions[session_type]:
-        user_sessions[session_type][chat_id] = [
-            {"role": "system", "content": SYSTEM_PROMPTS[session_type]}
-        ]
-
-    # 加入使用者訊息
-    user_sessions[session_type][chat_id].append({"role": "user", "content": message})
-
-    # 確定要嘗試的模型順序
-    models_to_try = [m for m in FALLBACK_MODELS if m != model]
-    models_to_try.insert(0, model)
-
-    reply = None
-    used_model = None
-
-    # 依序嘗試每個模型
-    for current_model in models_to_try:
-        try:
-            logger.info(f"Attempting to use model: {current_model} for session type: {session_type}")
-
-            # 呼叫 Groq API
-            response = groq_client.chat.completions.create(
-                messages=user_sessions[session_type][chat_id],
-                model=current_model,
-                temperature=0.7,
-                max_tokens=2000,
-                timeout=10
-            )
-
-            reply = response.choices[0].message.content
-            used_model = current_model
-            break
-
-        except Exception as e:
-            error_msg = str(e).lower()
-            logger.error(f"An exception occurred with model {current_model} for chat_id {chat_id}: {error_msg}")
-            # 如果是最後一個模型也失敗了，清理該聊天室的會話記錄
-            if current_model == models_to_try[-1]:
-                logger.warning(f"Clearing session for chat_id {chat_id} due to repeated failures")
-                if chat_id in user_sessions[session_type]:
-                    del user_sessions[session_type][chat_id]
-            continue
-
-    if reply is None:
-        logger.error(f"All models failed for chat_id {chat_id}, session_type {session_type}")
-        reply = "很抱歉，我現在暫時無法處理您的請求。請稍後再試。"
-
-    # 加入機器人回應到對話紀錄
-    user_sessions[session_type][chat_id].append({"role": "assistant", "content": reply})
-
-    # 控制對話歷史長度，避免消耗過多 tokens
-    _trim_conversation_history(chat_id, session_type)
-
-    # 記錄使用了哪個模型
-    logger.info(f"Response for user {chat_id} (session: {session_type}) was generated by model {used_model}")
-    return reply
+    # 同一份對話紀錄依序處理；不同會話類型互不等待，一般聊天不會被背景的單字請求阻塞
+    with _get_session_lock(chat_id, session_type):
+        # 初始化使用者對話紀錄，使用對應的系統提示詞
+        if chat_id not in user_sessions[session_type]:
+            user_sessions[session_type][chat_id] = [
+                {"role": "system", "content": SYSTEM_PROMPTS[session_type]}
+            ]
+
+        # 加入使用者訊息
+        user_sessions[session_type][chat_id].append({"role": "user", "content": message})
+
+        # 確定要嘗試的模型順序
+        models_to_try = [m for m in FALLBACK_MODELS if m != model]
+        models_to_try.insert(0, model)
+
+        reply = None
+        used_model = None
+
+        # 依序嘗試每個模型
+        for current_model in models_to_try:
+            try:
+                logger.info(f"Attempting to use model: {current_model} for session type: {session_type}")
+
+                # 呼叫 Groq API
+                response = groq_client.chat.completions.create(
+                    messages=user_sessions[session_type][chat_id],
+                    model=current_model,
+                    temperature=0.7,
+                    max_tokens=2000,
+                    timeout=10
+                )
+
+                reply = response.choices[0].message.content
+                used_model = current_model
+                break
+
+            except Exception as e:
+                error_msg = str(e).lower()
+                logger.error(f"An exception occurred with model {current_model} for chat_id {chat_id}: {error_msg}")
+                # 如果是最後一個模型也失敗了，清理該聊天室的會話記錄
+                if current_model == models_to_try[-1]:
+                    logger.warning(f"Clearing session for chat_id {chat_id} due to repeated failures")
+                    if chat_id in user_sessions[session_type]:
+                        del user_sessions[session_type][chat_id]
+                continue
+
+        # 所有模型都失敗時會話紀錄已被清除，直接回覆錯誤訊息，不再寫入對話紀錄
+        if reply is None:
+            logger.error(f"All models failed for chat_id {chat_id}, session_type {session_type}")
+            return "很抱歉，我現在暫時無法處理您的請求。請稍後再試。"
+
+        # 加入機器人回應到對話紀錄
+        user_sessions[session_type][chat_id].append({"role": "assistant", "content": reply})
+
+        # 控制對話歷史長度，避免消耗過多 tokens
+        _trim_conversation_history(chat_id, session_type)
+
+        # 記錄使用了哪個模型
+        logger.info(f"Response for user {chat_id} (session: {session_type}) was generated by model {used_model}")
+        return reply
 
 
 def _trim_conversation_history(chat_id: str, session_type: str = "chat", max_turns: int = 10) -> None:
@@ -1,4 +1,3 @@
-import json
 import logging
 from typing import Union
 
@@ -9,6 +8,7 @@ from linebot.models import (
 
 from app.services.groq_service import chat_with_groq
 from app.utils.google_tts import generate_audio_url
+from app.utils.json_extractor import extract_json
 from app.utils.theme import COLOR_THEME
 
 logger = logging.getLogger(__name__)
@@ -27,6 +27,22 @@ DIFFICULTY_NAMES = {
     '3': '高級 (Advanced)'
 }
 
+# 單字資料的必要欄位（缺少時補空字串）
+_WORD_DEFAULTS = {field: "" for field in (
+    "word", "pronunciation", "part_of_speech", "definition_en",
+    "definition_zh", "example_sentence", "example_translation"
+)}
+
+# 單字卡片共用的小字樣式
+_SM_PRIMARY = {"size": "sm", "color": COLOR_THEME['text_primary'], "wrap": True}
+_SM_SECONDARY = {"size": "sm", "color": COLOR_THEME['text_secondary'], "wrap": True}
+
+# 卡片共用的 body/footer 背景樣式（僅供序列化，各卡片共用同一物件）
+_CARD_STYLES = BubbleStyle(
+    body=BlockStyle(background_color=COLOR_THEME['card']),
+    footer=BlockStyle(background_color=COLOR_THEME['card'])
+)
+
 
 def get_english_words(chat_id: str, difficulty_id: int, count: int):
     """獲取指定難度和數量的英文單字"""
@@ -121,31 +137,12 @@ def get_single_english_word(chat_id: str, difficulty_level: str) -> Union[dict,
     response = chat_with_groq(chat_id, prompt, session_type="english")
 
     try:
-        if isinstance(response, str):
-            logger.info(f"Response is a string: {response[:200]}")
-            try:
-                word_data = json.loads(response)
-            except json.JSONDecodeError:
-                import re
-                json_match = re.search(r'(\{.*\})', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                    word_data = json.loads(json_str)
-                else:
-                    raise ValueError("Unable to extract JSON format from the string response")
-        elif hasattr(response, 'text'):
-            response_text = response.text
-            logger.info(f"Response has text attribute: {response_text[:200]}")
-            try:
-                word_data = json.loads(response_text)
-            except json.JSONDecodeError:
-                import re
-                json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                    word_data = json.loads(json_str)
-                else:
-                    raise ValueError("Unable to extract JSON format from the response text")
+        text = response if isinstance(response, str) else getattr(response, 'text', None)
+        if text is not None:
+            logger.info(f"Response text: {text[:200]}")
+            word_data = extract_json(text)
+            if word_data is None:
+                raise ValueError("Unable to extract JSON format from the response")
         elif hasattr(response, 'json'):
             word_data = response.json()
         else:
@@ -155,34 +152,20 @@ def get_single_english_word(chat_id: str, difficulty_level: str) -> Union[dict,
         logger.error(f"Failed to parse response as JSON: {str(e)}")
         return "抱歉，獲取英文單字時發生錯誤，請通知維護人員，謝謝。"
 
-    required_fields = ["word", "pronunciation", "part_of_speech", "definition_en",
-                       "definition_zh", "example_sentence", "example_translation"]
+    missing_fields = [field for field in _WORD_DEFAULTS if field not in word_data]
+    if missing_fields:
+        logger.warning(f"Missing {missing_fields} fields in word data. Set to empty string.")
 
-    for field in required_fields:
-        if field not in word_data:
-            word_data[field] = ""
-            logger.warning(f"Missing '{field}' field in word data. Set to empty string.")
-
-    return word_data
+    return {**_WORD_DEFAULTS, **word_data}
 
 
 def create_word_bubble(word_data: dict, difficulty_name: str):
     """
     創建單字的 bubble
     """
-    # 生成單字發音連結
-    try:
-        word_audio_url = generate_audio_url(word_data["word"])
-    except Exception as e:
-        logger.error(f"Error occurred while generating word pronunciation URL: {str(e)}")
-        word_audio_url = ""
-
-    # 生成例句發音連結
-    try:
-        example_audio_url = generate_audio_url(word_data["example_sentence"])
-    except Exception as e:
-        logger.error(f"Error occurred while generating example sentence pronunciation URL: {str(e)}")
-        example_audio_url = ""
+    # 生成單字與例句發音連結
+    word_audio_url = generate_audio_url(word_data["word"])
+    example_audio_url = generate_audio_url(word_data["example_sentence"])
 
     # Header
     header_box = BoxComponent(
@@ -209,36 +192,12 @@ def create_word_bubble(word_data: dict, difficulty_name: str):
             wrap=True
         ),
         TextComponent(
-            text=f"💡 英文解釋: {word_data['definition_en']}",
-            size="sm",
-            color=COLOR_THEME['text_secondary'],
-            wrap=True
-        ),
-        TextComponent(
-            text=f"📘 中文解釋: {word_data['definition_zh']}",
-            size="sm",
-            color=COLOR_THEME['text_secondary'],
-            wrap=True
+            text=f"💡 英文解釋: {word_data['definition_en']}\n📘 中文解釋: {word_data['definition_zh']}",
+            **_SM_SECONDARY
         ),
-        TextComponent(
-            text="✏️ 例句:",
-            weight="bold",
-            size="sm",
-            color=COLOR_THEME['text_primary'],
-            wrap=True
-        ),
-        TextComponent(
-            text=f"● {word_data['example_sentence']}",
-            wrap=True,
-            size="sm",
-            color=COLOR_THEME['text_primary']
-        ),
-        TextComponent(
-            text=f"○ {word_data['example_translation']}",
-            wrap=True,
-            size="sm",
-            color=COLOR_THEME['text_secondary']
-        )
+        TextComponent(text="✏️ 例句:", weight="bold", **_SM_PRIMARY),
+        TextComponent(text=f"● {word_data['example_sentence']}", **_SM_PRIMARY),
+        TextComponent(text=f"○ {word_data['example_translation']}", **_SM_SECONDARY)
     ]
 
     body_box = BoxComponent(
@@ -283,10 +242,7 @@ def create_word_bubble(word_data: dict, difficulty_name: str):
         header=header_box,
         body=body_box,
         footer=footer_box,
-        styles=BubbleStyle(
-            body=BlockStyle(background_color=COLOR_THEME['card']),
-            footer=BlockStyle(background_color=COLOR_THEME['card'])
-        )
+        styles=_CARD_STYLES
     )
 
     return bubble
@@ -349,10 +305,7 @@ def get_english_difficulty_menu() -> FlexSendMessage:
     bubble = BubbleContainer(
         body=body_box,
         footer=footer_box,
-        styles=BubbleStyle(
-            body=BlockStyle(background_color=COLOR_THEME['card']),
-            footer=BlockStyle(background_color=COLOR_THEME['card'])
-        )
+        styles=_CARD_STYLES
     )
 
     return FlexSendMessage(alt_text="英文單字難度選單", contents=bubble)
@@ -427,10 +380,7 @@ def get_english_count_menu(difficulty_id: str) -> FlexSendMessage:
     bubble = BubbleContainer(
         body=body_box,
         footer=footer_box,
-        styles=BubbleStyle(
-            body=BlockStyle(background_color=COLOR_THEME['card']),
-            footer=BlockStyle(background_color=COLOR_THEME['card'])
-        )
+        styles=_CARD_STYLES
     )
 
     return FlexSendMessage(
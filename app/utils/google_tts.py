@@ -1,9 +1,17 @@
+from functools import lru_cache
 from urllib.parse import quote
 
 
 # 產生 Google TTS 音訊連結
 def generate_audio_url(text):
-    if not text:
+    # AI 回傳的欄位不一定是字串，非字串或空值不產生連結（也避免不可雜湊的值進入快取）
+    if not isinstance(text, str) or not text:
         return ""
+    return _build_audio_url(text)
+
+
+# 相同文字直接使用快取結果
+@lru_cache(maxsize=4096)
+def _build_audio_url(text):
     encoded_text = quote(text)
     return f"https://translate.google.com/translate_tts?ie=UTF-8&tl=en&client=tw-ob&q={encoded_text}"
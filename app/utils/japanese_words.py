@@ -1,4 +1,3 @@
-import json
 import logging
 
 from linebot.models import FlexSendMessage, BubbleContainer, BoxComponent, TextComponent, ButtonComponent, URIAction, \
@@ -6,6 +5,7 @@ from linebot.models import FlexSendMessage, BubbleContainer, BoxComponent, TextC
 
 from app.services.groq_service import chat_with_groq
 from app.utils.google_tts import generate_audio_url
+from app.utils.json_extractor import extract_json
 from app.utils.theme import COLOR_THEME
 
 logger = logging.getLogger(__name__)
@@ -49,31 +49,12 @@ def get_japanese_word(chat_id: str):
     response = chat_with_groq(chat_id, prompt, session_type="japanese")
 
     try:
-        if isinstance(response, str):
-            logger.info(f"Response is a string: {response[:200]}")
-            try:
-                word_data = json.loads(response)
-            except json.JSONDecodeError:
-                import re
-                json_match = re.search(r'(\{.*\})', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                    word_data = json.loads(json_str)
-                else:
-                    raise ValueError("Unable to extract JSON format from the string response")
-        elif hasattr(response, 'text'):
-            response_text = response.text
-            logger.info(f"Response has text attribute: {response_text[:200]}")
-            try:
-                word_data = json.loads(response_text)
-            except json.JSONDecodeError:
-                import re
-                json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                    word_data = json.loads(json_str)
-                else:
-                    raise ValueError("Unable to extract JSON format from the response text")
+        text = response if isinstance(response, str) else getattr(response, 'text', None)
+        if text is not None:
+            logger.info(f"Response text: {text[:200]}")
+            word_data = extract_json(text)
+            if word_data is None:
+                raise ValueError("Unable to extract JSON format from the response")
         elif hasattr(response, 'json'):
             word_data = response.json()
         else:
@@ -102,19 +83,9 @@ def create_japanese_flex_bubble(word_data):
     """
     使用 LINE SDK 的原生物件建立日文 Flex 訊息
     """
-    # 生成單字發音連結（日文）
-    try:
-        word_audio_url = generate_audio_url(word_data["word"])
-    except Exception as e:
-        logger.error(f"Error occurred while generating Japanese word pronunciation URL: {str(e)}")
-        word_audio_url = ""
-
-    # 生成例句發音連結（日文）
-    try:
-        example_audio_url = generate_audio_url(word_data["example_sentence"])
-    except Exception as e:
-        logger.error(f"Error occurred while generating Japanese example sentence pronunciation URL: {str(e)}")
-        example_audio_url = ""
+    # 生成單字與例句發音連結（日文）
+    word_audio_url = generate_audio_url(word_data["word"])
+    example_audio_url = generate_audio_url(word_data["example_sentence"])
 
     # 使用 LINE SDK 內建的物件
     header_box = BoxComponent(
@@ -0,0 +1,15 @@
+import json
+import re
+from typing import Optional
+
+# 擷取回應中的 JSON 物件
+_JSON_OBJ_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def extract_json(text: str) -> Optional[dict]:
+    """解析 AI 回應中的 JSON，若夾雜其他文字則擷取其中的 JSON 物件"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        json_match = _JSON_OBJ_RE.search(text)
+        return json.loads(json_match.group(0)) if json_match else None
@@ -1,15 +1,21 @@
+import io
 import logging
 import re
+import threading
 import time
 import urllib.parse
-from typing import Optional, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Optional, Dict, Iterable, Iterator
 
-from bs4 import BeautifulSoup
+from lxml import etree
 from linebot.models import (
     FlexSendMessage, BubbleContainer, BoxComponent, TextComponent,
     ButtonComponent, URIAction, CarouselContainer, ImageComponent
 )
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import (
+    sync_playwright, BrowserContext, Page, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+)
 
 from app.utils.theme import COLOR_THEME
 
@@ -20,14 +26,72 @@ MAX_MOVIES = 12
 LINE_TODAY_URL = "https://today.line.me/tw/v2/movie/chart/trending"
 CACHE_TTL = 6 * 60 * 60  # 6 小時快取
 
+
+# XPath：依 class 名稱比對（等同 BeautifulSoup 的 class_ 比對方式）
+def _has_class(class_name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# 各欄位預先編譯的 XPath，每個欄位只取第一個符合的節點（等同 BeautifulSoup 的 find）
+_FIELD_XPATHS = {
+    field: etree.XPath(f"({path})[1]")
+    for field, path in (
+        ('title', f".//h2[{_has_class('detailListItem-title')}]"),
+        ('eng_title', f".//h3[{_has_class('detailListItem-engTitle')}]"),
+        ('rating', f".//span[{_has_class('iconInfo-text')}]"),
+        ('image', f".//figure[{_has_class('detailListItem-posterImage')}]"),
+        ('cert', f".//div[{_has_class('detailListItem-certificate')}]//span[{_has_class('glnBadge-text')}]"),
+        ('status', f".//div[{_has_class('detailListItem-status')}]"),
+        ('genre', f".//div[{_has_class('detailListItem-category')}]"),
+        ('trailer', f".//a[{_has_class('detailListItem-trailer')}]"),
+    )
+}
+
+# 預先編譯的正規表示式
+_BG_URL_RE = re.compile(r"url\(['\"]?([^'\")]+)['\"]?\)", re.IGNORECASE)  # 涵蓋 background-image / background
+_DURATION_RE = re.compile(r'(\d+小時\d+分)')
+_RELEASE_RE = re.compile(r'上映(\d+週|\d+天)')
+_SPLIT_RE = re.compile(r'[•\s]+')
+_TITLE_CLEAN_RE = re.compile(r'[^\w\s\u4e00-\u9fff]')
+
+# 電影卡片共用的小字樣式
+_SM_INFO = {"size": "sm", "color": COLOR_THEME['text_on_light'], "wrap": True, "margin": "xs"}
+
 # 快取
 _cache = {'message': None, 'timestamp': 0}
+_cache_lock = threading.Lock()
 
 # 請求標頭
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
+# 爬取時不載入的資源類型
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media', 'stylesheet'})
+
+# 海報載入完成判斷：全部海報都有圖片網址，或已載入數量維持 500ms 不變
+_POSTERS_READY_JS = """
+    () => {
+        const figures = document.querySelectorAll('figure.detailListItem-posterImage');
+        const loaded = document.querySelectorAll('figure.detailListItem-posterImage[style*="url("]').length;
+        if (loaded >= figures.length) return true;
+        const now = performance.now();
+        if (loaded !== window.__posterCount) {
+            window.__posterCount = loaded;
+            window.__posterTime = now;
+            return false;
+        }
+        return now - window.__posterTime > 500;
+    }
+"""
+
+# 共用的 Playwright 瀏覽器，避免每次請求都重新啟動 Chromium
+# Playwright sync API 只能在啟動它的執行緒中使用，因此所有瀏覽器操作都交由同一條執行緒處理
+_playwright_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playwright")
+_playwright = None
+_browser = None
+_browser_context = None
+
 
 def get_movies(force_refresh: bool = False) -> Optional[FlexSendMessage]:
     """取得電影排行榜"""
@@ -36,26 +100,37 @@ def get_movies(force_refresh: bool = False) -> Optional[FlexSendMessage]:
         logger.info("使用快取")
         return _cache['message']
 
-    # 取得新資料
-    logger.info("取得新資料")
-    movies = scrape_movies()
-    if not movies:
-        return None
-
-    # 建立 Flex Message
-    bubbles = [create_bubble(movie) for movie in movies[:MAX_MOVIES]]
-    bubbles = [b for b in bubbles if b]
-
-    if bubbles:
-        flex_msg = FlexSendMessage(
-            alt_text="電影排行榜",
-            contents=CarouselContainer(contents=bubbles)
-        )
-        # 更新快取
-        _cache.update({'message': flex_msg, 'timestamp': time.time()})
-        return flex_msg
+    # 同一時間只爬取一次，其他請求等待並共用結果
+    with _cache_lock:
+        if not force_refresh and _is_cache_valid():
+            logger.info("使用快取")
+            return _cache['message']
+
+        # 取得新資料
+        logger.info("取得新資料")
+        movies = list(islice(scrape_movies(), MAX_MOVIES))
+        logger.info(f"取得到 {len(movies)} 部電影")
+        if not movies:
+            return None
+
+        # 建立 Flex Message
+        bubbles = []
+        for movie in movies:
+            try:
+                bubbles.append(create_bubble(movie))
+            except Exception as e:
+                logger.error(f"建立卡片失敗 ({movie.get('title')}): {e}")
+
+        if bubbles:
+            flex_msg = FlexSendMessage(
+                alt_text="電影排行榜",
+                contents=CarouselContainer(contents=bubbles)
+            )
+            # 更新快取
+            _cache.update({'message': flex_msg, 'timestamp': time.time()})
+            return flex_msg
 
-    return None
+        return None
 
 
 def _is_cache_valid() -> bool:
@@ -64,203 +139,268 @@ def _is_cache_valid() -> bool:
             time.time() - _cache['timestamp'] < CACHE_TTL)
 
 
-def scrape_movies() -> List[Dict]:
+def scrape_movies() -> Iterable[Dict]:
     """爬取電影資料"""
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    return _playwright_executor.submit(_scrape_movies).result()
 
-        try:
-            page.set_extra_http_headers(HEADERS)
-            page.goto(LINE_TODAY_URL, timeout=20000)
-            page.wait_for_selector('li.detailList-item', timeout=15000)
-
-            # 滾動載入內容
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            page.wait_for_timeout(1000)
-
-            # 觸發圖片懶載入
-            page.evaluate("""
-                document.querySelectorAll('figure.detailListItem-posterImage').forEach(el => {
-                    const src = el.getAttribute('data-bg') || el.getAttribute('data-src');
-                    if (src) el.style.backgroundImage = `url(${src})`;
+
+def _scrape_movies() -> Iterable[Dict]:
+    """於 Playwright 執行緒中爬取電影資料"""
+    page = _open_page()
+
+    try:
+        page.goto(LINE_TODAY_URL, timeout=20000)
+        page.wait_for_selector('li.detailList-item', timeout=15000)
+
+        # 滾動載入內容
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        _wait_for_posters(page, timeout=1500)
+
+        # 觸發圖片懶載入
+        page.evaluate("""
+            () => {
+                // 先讀取所有屬性，再於同一個 frame 內一次寫入樣式
+                const figures = document.querySelectorAll('figure.detailListItem-posterImage');
+                const updates = [];
+                for (let i = 0; i < figures.length; i++) {
+                    const el = figures[i];
+                    const src = el.getAttribute('data-bg') || el.getAttribute('data-background') ||
+                        el.getAttribute('data-src');
+                    if (src) updates.push([el, src]);
+                }
+                requestAnimationFrame(() => {
+                    for (let i = 0; i < updates.length; i++) {
+                        updates[i][0].style.backgroundImage = `url(${updates[i][1]})`;
+                    }
                 });
-            """)
-            page.wait_for_timeout(2000)
+            }
+        """)
+        _wait_for_posters(page, timeout=2000)
+
+        return parse_html(page.content())
+
+    except PlaywrightTimeoutError:
+        logger.warning("請求逾時")
+        return []
+    finally:
+        page.close()
 
-            return parse_html(page.content())
 
-        except PlaywrightTimeoutError:
-            logger.warning("請求逾時")
-            return []
-        finally:
+def _block_resources(route) -> None:
+    """略過圖片、字型等資源；海報網址直接由 style 屬性取得，不需實際下載"""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+def _wait_for_posters(page, timeout: int) -> None:
+    """等待海報圖片載入：全部載入或數量穩定即結束，逾時則直接繼續"""
+    page.evaluate("window.__posterCount = -1")
+    try:
+        page.wait_for_function(_POSTERS_READY_JS, polling=100, timeout=timeout)
+    except PlaywrightTimeoutError:
+        logger.debug("等待海報載入逾時，使用目前內容")
+
+
+def _open_page() -> Page:
+    """開啟新分頁；共用的瀏覽器失效時（driver 中止、context 已關閉等）重置後重試一次"""
+    try:
+        return _get_browser_context().new_page()
+    except PlaywrightError as e:
+        logger.warning(f"共用瀏覽器無法使用，重新啟動: {e}")
+        _reset_browser()
+        return _get_browser_context().new_page()
+
+
+def _reset_browser() -> None:
+    """盡可能關閉並清除共用的 Playwright 物件，讓下次呼叫重新啟動"""
+    global _playwright, _browser, _browser_context
+
+    for close in (
+            _browser_context and _browser_context.close,
+            _browser and _browser.close,
+            _playwright and _playwright.stop,
+    ):
+        if close:
+            try:
+                close()
+            except Exception as e:
+                logger.debug(f"關閉 Playwright 物件失敗: {e}")
+
+    _playwright = _browser = _browser_context = None
+
+
+def _get_browser_context() -> BrowserContext:
+    """取得共用的瀏覽器 context，首次呼叫或瀏覽器斷線時才啟動 Chromium"""
+    global _playwright, _browser, _browser_context
+
+    if _browser_context is None or _browser is None or not _browser.is_connected():
+        if _playwright is None:
+            _playwright = sync_playwright().start()
+        logger.info("啟動 Chromium")
+
+        # 瀏覽器與 context 都建立成功後才更新共用物件，失敗時下次呼叫會重新啟動
+        browser = _playwright.chromium.launch(headless=True)
+        try:
+            context = browser.new_context(extra_http_headers=HEADERS)
+            context.route("**/*", _block_resources)
+        except Exception:
             browser.close()
+            raise
+
+        _browser, _browser_context = browser, context
+
+    return _browser_context
 
 
-def parse_html(html: str) -> List[Dict]:
-    """解析 HTML 取得電影資訊"""
-    soup = BeautifulSoup(html, 'html.parser')
-    movies = []
+def parse_html(html: str) -> Iterator[Dict]:
+    """解析 HTML 取得電影資訊（逐部產生，只解析實際取用的部分）"""
+    # 逐一串流解析 <li>，處理完即釋放節點，不保留整份 DOM
+    for _, item in etree.iterparse(io.BytesIO(html.encode('utf-8')), tag='li', html=True, encoding='utf-8'):
+        if 'detailList-item' not in item.get('class', '').split():
+            continue
 
-    for item in soup.find_all('li', class_='detailList-item'):
         movie = extract_movie_data(item)
         if movie.get('title'):
-            movies.append(movie)
+            yield movie
 
-    logger.info(f"取得到 {len(movies)} 部電影")
-    return movies
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
 
 
 def extract_movie_data(item) -> Dict:
     """提取單一電影資料"""
+    # 依各欄位的 XPath 取得節點，節點歸屬於查詢它的欄位
+    fields = {}
+    for field, xpath in _FIELD_XPATHS.items():
+        found = xpath(item)
+        if found:
+            fields[field] = found[0]
+
     movie = {}
 
     # 基本資訊
-    movie['title'] = get_text(item, 'h2', 'detailListItem-title')
-    movie['eng_title'] = get_text(item, 'h3', 'detailListItem-engTitle')
-    movie['rating'] = get_text(item, 'span', 'iconInfo-text')
+    movie['title'] = get_text(fields.get('title'))
+    movie['eng_title'] = get_text(fields.get('eng_title'))
+    movie['rating'] = get_text(fields.get('rating'))
 
     # 圖片
-    movie['image'] = extract_image(item)
+    figure = fields.get('image')
+    movie['image'] = extract_image(figure.get('style', '')) if figure is not None else ""
 
     # 分級
-    cert_div = item.find('div', class_='detailListItem-certificate')
-    if cert_div:
-        badge = cert_div.find('span', class_='glnBadge-text')
-        if badge:
-            movie['cert'] = badge.get_text(strip=True)
+    if 'cert' in fields:
+        movie['cert'] = get_text(fields['cert'])
 
     # 狀態資訊（片長、上映時間）
-    status_div = item.find('div', class_='detailListItem-status')
-    if status_div:
-        text = status_div.get_text(strip=True)
-        duration_match = re.search(r'(\d+小時\d+分)', text)
+    if 'status' in fields:
+        text = get_text(fields['status'])
+        duration_match = _DURATION_RE.search(text)
         if duration_match:
             movie['duration'] = duration_match.group(1)
 
-        release_match = re.search(r'上映(\d+週|\d+天)', text)
+        release_match = _RELEASE_RE.search(text)
         if release_match:
             movie['release'] = f"上映{release_match.group(1)}"
 
     # 類型
-    category_div = item.find('div', class_='detailListItem-category')
-    if category_div:
-        text = category_div.get_text(strip=True)
+    if 'genre' in fields:
+        text = get_text(fields['genre'])
         if '級' in text:
             types = text.split('級')[-1]
-            type_list = [t for t in re.split(r'[•\s]+', types) if t]
+            type_list = [t for t in _SPLIT_RE.split(types) if t]
             if type_list:
                 movie['genre'] = ' • '.join(type_list)
 
     # 預告片連結
-    trailer = item.find('a', class_='detailListItem-trailer')
-    if trailer and trailer.has_attr('href'):
-        movie['trailer'] = f"https://today.line.me{trailer['href']}"
+    trailer = fields.get('trailer')
+    if trailer is not None and trailer.get('href') is not None:
+        movie['trailer'] = f"https://today.line.me{trailer.get('href')}"
 
     return movie
 
 
-def get_text(item, tag: str, class_name: str) -> str:
+def get_text(element) -> str:
     """取得文字內容"""
-    element = item.find(tag, class_=class_name)
-    return element.get_text(strip=True) if element else ""
-
-
-def extract_image(item) -> str:
-    """提取圖片URL"""
-    figure = item.find('figure', class_='detailListItem-posterImage')
-    if not figure or not figure.has_attr('style'):
+    if element is None:
         return ""
+    return ''.join(text.strip() for text in element.itertext())
 
-    style = figure['style']
-    match = re.search(r"url\(['\"]?(.*?)['\"]?\)", style, re.IGNORECASE)
-    if match:
-        img_url = match.group(1).strip('\'"').strip()
-        if img_url and not img_url.startswith('data:'):
-            return img_url
-    return ""
 
+def extract_image(style: str) -> str:
+    """從 style 屬性提取圖片URL"""
+    # 一般情況直接以字串搜尋切出 url(...) 內容（不分大小寫），格式異常時才使用正規表示式
+    start = style.lower().find('url(')
+    end = style.find(')', start + 4) if start >= 0 else -1
+    img_url = style[start + 4:end].strip(' \'"') if end >= 0 else ""
+    if not img_url:
+        match = _BG_URL_RE.search(style)
+        img_url = match.group(1).strip(' \'"') if match else ""
+    return img_url if not img_url.startswith('data:') else ""
 
-def create_bubble(movie: Dict) -> Optional[BubbleContainer]:
+
+def create_bubble(movie: Dict) -> BubbleContainer:
     """建立電影卡片"""
-    try:
-        # 圖片
-        hero = None
-        if movie.get('image'):
-            hero = ImageComponent(
-                url=movie['image'],
-                size="full",
-                aspectRatio="2:3",
-                aspectMode="cover"
-            )
+    title = movie.get('title', '未知電影')
+    eng_title = movie.get('eng_title')
+    rating = movie.get('rating')
+    cert = movie.get('cert')
+    image = movie.get('image')
+    trailer = movie.get('trailer')
 
-        # 內容
-        contents = [
-            TextComponent(text=movie.get('title', '未知電影'), weight="bold", size="lg", wrap=True)
-        ]
-
-        if movie.get('eng_title'):
-            contents.append(TextComponent(
-                text=movie['eng_title'],
-                size="sm",
-                color=COLOR_THEME['text_on_light'],
-                wrap=True,
-                margin="xs"
-            ))
-
-        # 評分和分級
-        rating_box = []
-        if movie.get('rating'):
-            rating_box.append(
-                TextComponent(text=f"⭐ {movie['rating']}", size="sm", color=COLOR_THEME['warning'], flex=1))
-        if movie.get('cert'):
-            rating_box.append(TextComponent(text=f"🔞 {movie['cert']}", size="sm", color=COLOR_THEME['error'], flex=1))
-        if rating_box:
-            contents.append(BoxComponent(layout="horizontal", contents=rating_box, margin="sm"))
-
-        # 其他資訊
-        for info, icon in [(movie.get('duration'), '⏱️'), (movie.get('genre'), '🎬'), (movie.get('release'), '📅')]:
-            if info:
-                contents.append(
-                    TextComponent(text=f"{icon} {info}", size="sm", color=COLOR_THEME['text_on_light'], wrap=True,
-                                  margin="xs"))
-
-        # 按鈕
-        buttons = []
-        if movie.get('trailer'):
-            buttons.append(ButtonComponent(
-                action=URIAction(label="官方預告", uri=movie['trailer']),
-                style="primary", color=COLOR_THEME['primary'], flex=1
-            ))
-
-        # YouTube搜尋連結
-        youtube_url = create_youtube_link(movie.get('title', ''))
-        buttons.append(ButtonComponent(
-            action=URIAction(label="YouTube預告", uri=youtube_url),
+    # 圖片
+    hero = ImageComponent(url=image, size="full", aspectRatio="2:3", aspectMode="cover") if image else None
+
+    # 內容
+    contents = [TextComponent(text=title, weight="bold", size="lg", wrap=True)]
+
+    if eng_title:
+        contents.append(TextComponent(text=eng_title, **_SM_INFO))
+
+    # 評分和分級
+    rating_box = [
+        *([TextComponent(text=f"⭐ {rating}", size="sm", color=COLOR_THEME['warning'], flex=1)] if rating else []),
+        *([TextComponent(text=f"🔞 {cert}", size="sm", color=COLOR_THEME['error'], flex=1)] if cert else []),
+    ]
+    if rating_box:
+        contents.append(BoxComponent(layout="horizontal", contents=rating_box, margin="sm"))
+
+    # 其他資訊
+    contents += [
+        TextComponent(text=f"{icon} {info}", **_SM_INFO)
+        for info, icon in ((movie.get('duration'), '⏱️'), (movie.get('genre'), '🎬'), (movie.get('release'), '📅'))
+        if info
+    ]
+
+    # 按鈕（官方預告 + YouTube搜尋連結）
+    buttons = [
+        *([ButtonComponent(
+            action=URIAction(label="官方預告", uri=trailer),
+            style="primary", color=COLOR_THEME['primary'], flex=1
+        )] if trailer else []),
+        ButtonComponent(
+            action=URIAction(label="YouTube預告", uri=create_youtube_link(movie.get('title', ''))),
             style="secondary", color=COLOR_THEME['info'], flex=1
-        ))
-
-        footer = None
-        if buttons:
-            footer = BoxComponent(
-                layout="vertical",
-                contents=[BoxComponent(layout="horizontal", contents=buttons, spacing="sm")],
-                paddingAll="20px"
-            )
+        ),
+    ]
 
-        return BubbleContainer(
-            hero=hero,
-            body=BoxComponent(layout="vertical", contents=contents, spacing="sm", paddingAll="20px"),
-            footer=footer
-        )
+    footer = BoxComponent(
+        layout="vertical",
+        contents=[BoxComponent(layout="horizontal", contents=buttons, spacing="sm")],
+        paddingAll="20px"
+    )
 
-    except Exception as e:
-        logger.error(f"建立卡片失敗: {e}")
-        return None
+    return BubbleContainer(
+        hero=hero,
+        body=BoxComponent(layout="vertical", contents=contents, spacing="sm", paddingAll="20px"),
+        footer=footer
+    )
 
 
 def create_youtube_link(title: str) -> str:
     """建立 YouTube 搜尋連結"""
-    clean_title = re.sub(r'[^\w\s\u4e00-\u9fff]', '', title.strip())
+    clean_title = _TITLE_CLEAN_RE.sub('', title.strip())
     query = f"{clean_title} 官方預告片"
     return f"https://www.youtube.com/results?search_query={urllib.parse.quote(query)}"